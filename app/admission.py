@@ -0,0 +1,185 @@
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, NamedTuple, Optional
+
+import pandas as pd
+
+from cache import ttl_cache
+from configs.config import GROUPING_VALUES, POSSIBLE_GROUPINGS, STATS_CACHE_TTL
+from models import db, Event
+from validators import CanonicalQuery
+
+
+class CostEstimate(NamedTuple):
+    grouping: str
+    buckets: int
+    rows_scanned: int
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when timeline request can't be admitted. Carries data for HTTP response.
+    retry_after is None, if retrying the same request can't succeed.
+    """
+
+    def __init__(self, status: int, msg: str, retry_after: Optional[int] = None):
+        super().__init__(msg)
+        self.status = status
+        self.msg = msg
+        self.retry_after = retry_after
+
+
+@ttl_cache(STATS_CACHE_TTL)
+def count_rows() -> int:
+    """
+    Counts rows in Event table. Cached in-process for STATS_CACHE_TTL seconds.
+
+    :return: Number of rows as int.
+    """
+    return db.session.query(Event).count()
+
+
+@lru_cache(maxsize=1024)
+def count_buckets(start, end, grouping: str) -> int:
+    """
+    Counts number of time periods, which get_data will make a separate count query for.
+
+    :param start: Period start date as datetime.
+    :param end: Period end date as datetime.
+    :param grouping: Grouping key as str.
+    :return: Number of buckets as int.
+    """
+    time_periods = pd.date_range(start, end, freq=GROUPING_VALUES.get(grouping))
+
+    # If timestamp less then frequency, only one count query is made
+    if not len(time_periods):
+        return 1
+
+    # One more bucket for days left after last period
+    return len(time_periods) + int(time_periods[-1] < end)
+
+
+def estimate_cost(query: CanonicalQuery) -> CostEstimate:
+    """
+    Predicts cost of timeline request.
+    Neither timestamp nor filter columns are indexed, so every bucket count
+    scans whole table, regardless of filters.
+
+    :param query: CanonicalQuery object.
+    :return: CostEstimate object.
+    """
+    buckets = count_buckets(query.startDate, query.endDate, query.Grouping)
+    return CostEstimate(query.Grouping, buckets, buckets * count_rows())
+
+
+class AdmissionController:
+    """
+    Limits summary estimated cost of timeline requests processed by worker at the same time.
+    Single request can't cost more than max_request_cost, so it never takes whole budget
+    and cheap requests still can be admitted next to it.
+    """
+
+    def __init__(
+        self,
+        budget: int,
+        max_request_cost: int,
+        queue_timeout: float,
+        retry_after: int,
+    ):
+        self.budget = budget
+        self.max_request_cost = min(max_request_cost, budget)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._metrics = {
+            "admitted": 0,
+            "queued": 0,
+            "downsampled": 0,
+            "rejected_too_expensive": 0,
+            "rejected_overloaded": 0,
+            # Estimates of requests as they came
+            "requested_buckets_total": 0,
+            "requested_rows_total": 0,
+            # Estimates of admitted requests, after down-sampling
+            "executed_buckets_total": 0,
+            "executed_rows_total": 0,
+        }
+
+    def _inc(self, key: str, value: int = 1) -> None:
+        with self._cond:
+            self._metrics[key] += value
+
+    def plan(self, query: CanonicalQuery) -> CostEstimate:
+        """
+        Estimates request cost and, if it exceeds max_request_cost, tries coarser groupings.
+
+        :param query: CanonicalQuery object.
+        :return: CostEstimate object, which doesn't exceed max_request_cost.
+        """
+        estimate = estimate_cost(query)
+        self._inc("requested_buckets_total", estimate.buckets)
+        self._inc("requested_rows_total", estimate.rows_scanned)
+
+        if estimate.rows_scanned <= self.max_request_cost:
+            return estimate
+
+        # POSSIBLE_GROUPINGS is ordered from finest to coarsest
+        for grouping in POSSIBLE_GROUPINGS[POSSIBLE_GROUPINGS.index(query.Grouping) + 1:]:
+            estimate = estimate_cost(query._replace(Grouping=grouping))
+            if estimate.rows_scanned <= self.max_request_cost:
+                self._inc("downsampled")
+                return estimate
+
+        # Estimate doesn't depend on load, so there is no point to retry
+        self._inc("rejected_too_expensive")
+        raise AdmissionRejected(
+            429,
+            "Requested period is too long, make it shorter or use coarser Grouping",
+        )
+
+    @contextmanager
+    def admit(self, estimate: CostEstimate) -> Iterator[None]:
+        """
+        Reserves estimated cost from budget for the time of request processing.
+        Waits up to queue_timeout seconds, if budget is taken by other requests.
+
+        :param estimate: CostEstimate object returned by plan.
+        """
+        cost = estimate.rows_scanned
+        with self._cond:
+            if self.in_flight + cost > self.budget:
+                self._metrics["queued"] += 1
+                if not self._cond.wait_for(
+                    lambda: self.in_flight + cost <= self.budget, self.queue_timeout
+                ):
+                    self._metrics["rejected_overloaded"] += 1
+                    raise AdmissionRejected(
+                        503, "Server is overloaded, try again later", self.retry_after
+                    )
+            self._metrics["admitted"] += 1
+            self._metrics["executed_buckets_total"] += estimate.buckets
+            self._metrics["executed_rows_total"] += cost
+            self.in_flight += cost
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= cost
+                self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        """
+        Forms snapshot of admission counters.
+
+        :return: Dict where key=metric name and value=metric value.
+        """
+        with self._cond:
+            return {
+                **self._metrics,
+                "in_flight_cost": self.in_flight,
+                "budget": self.budget,
+                "max_request_cost": self.max_request_cost,
+            }
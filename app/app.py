@@ -2,6 +2,7 @@ from flask import Flask
 from flask_pydantic import validate
 from flask_restful import Resource, Api
 
+from admission import AdmissionController, AdmissionRejected
 from configs.config import POSSIBLE_TYPES, POSSIBLE_GROUPINGS
 from models import db
 from utils import (
@@ -51,25 +52,52 @@ class Info(Resource):
 
 class Timeline(Resource):
     @validate()
-    def get(self, query: EventModel) -> dict:
+    def get(self, query: EventModel) -> tuple:
         """
         GET request handler with URL params parser.
+        Expensive requests may be queued, down-sampled to coarser Grouping or rejected.
 
         :param query: Pydantic params validator
-        :return: Dict which will be formatted to JSON
+        :return: Dict which will be formatted to JSON, status code and headers
         """
-        filters = form_filters(query)
-        data = get_data(
-            query.startDate, query.endDate, query.Grouping, query.Type, filters
-        )
+        try:
+            estimate = admission.plan(query.canonical())
+            with admission.admit(estimate):
+                filters = form_filters(query)
+                data = get_data(
+                    query.startDate,
+                    query.endDate,
+                    estimate.grouping,
+                    query.Type,
+                    filters,
+                )
+        except AdmissionRejected as e:
+            headers = {}
+            if e.retry_after is not None:
+                headers["Retry-After"] = str(e.retry_after)
+            return {"success": False, "msg": e.msg}, e.status, headers
 
         total_days = count_days_between_timestamp(query.startDate, query.endDate)
-        return {
-            "success": True,
-            "quantity": len(data),
-            "total_days": total_days,
-            "timeline": data,
-        }
+        return (
+            {
+                "success": True,
+                "quantity": len(data),
+                "total_days": total_days,
+                "timeline": data,
+            },
+            200,
+            {"X-Timeline-Grouping": estimate.grouping},
+        )
+
+
+class Metrics(Resource):
+    def get(self) -> dict:
+        """
+        Simple GET request handler.
+
+        :return: Dict with admission control metrics of current worker
+        """
+        return admission.metrics()
 
 
 # Flask setup
@@ -77,11 +105,18 @@ app = Flask(__name__)
 app.config.from_pyfile("configs/dev.py")
 db.init_app(app)
 api = Api(app)
+admission = AdmissionController(
+    budget=app.config["TIMELINE_COST_BUDGET"],
+    max_request_cost=app.config["TIMELINE_MAX_REQUEST_COST"],
+    queue_timeout=app.config["TIMELINE_QUEUE_TIMEOUT"],
+    retry_after=app.config["TIMELINE_RETRY_AFTER"],
+)
 
 # API routes
 api.add_resource(Index, "/")
 api.add_resource(Info, "/api/info")
 api.add_resource(Timeline, "/api/timeline")
+api.add_resource(Metrics, "/api/metrics")
 
 if __name__ == "__main__":
     app.run(debug=app.config["DEBUG"])
@@ -0,0 +1,32 @@
+import time
+from functools import wraps
+from typing import Callable
+
+
+def ttl_cache(seconds: float) -> Callable:
+    """
+    Caches function result per args for limited time.
+    Unlike lru_cache, values computed before DB was filled are not kept forever.
+
+    :param seconds: Lifetime of cached value in seconds.
+    :return: Decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        cache = {}
+
+        @wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+            hit = cache.get(args)
+            if hit is not None and hit[0] > now:
+                return hit[1]
+
+            value = func(*args)
+            cache[args] = (now + seconds, value)
+            return value
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
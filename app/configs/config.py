@@ -14,3 +14,6 @@ INVALID_VALUE_ERROR_TEXT = (
     "Invalid value, visit /api/info for more information. "
     "If you want to use multiple values, use comma separator"
 )
+
+# Lifetime in seconds of in-process cached DB stats (unique values, rows count)
+STATS_CACHE_TTL = 60
@@ -1,3 +1,10 @@
 SQLALCHEMY_DATABASE_URI = "sqlite:///../db.sqlite3"
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 DEBUG = True
+
+# Admission control: max summary rows scanned by requests in flight, per worker
+TIMELINE_COST_BUDGET = 10_000_000
+# Max rows scanned by single request, expensive ones are down-sampled or rejected
+TIMELINE_MAX_REQUEST_COST = 2_500_000
+TIMELINE_QUEUE_TIMEOUT = 5
+TIMELINE_RETRY_AFTER = 10
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import pytest
+
+import admission
+import utils
+from admission import AdmissionController, AdmissionRejected, CostEstimate, count_buckets
+from validators import CanonicalQuery
+
+ROWS = 10
+START = datetime(2019, 1, 1)
+END = datetime(2019, 12, 31)
+
+
+@pytest.fixture(autouse=True)
+def rows(monkeypatch):
+    monkeypatch.setattr(admission, "count_rows", lambda: ROWS)
+
+
+def make_query(grouping: str = "weekly") -> CanonicalQuery:
+    return CanonicalQuery(START, END, "usual", grouping, None, None, None, None)
+
+
+def make_controller(budget: int, max_request_cost: int) -> AdmissionController:
+    return AdmissionController(
+        budget=budget, max_request_cost=max_request_cost, queue_timeout=0.05, retry_after=10
+    )
+
+
+@pytest.mark.parametrize("start, end", [
+    (datetime(2019, 1, 1), datetime(2019, 1, 2)),
+    (datetime(2019, 1, 1), datetime(2019, 3, 1)),
+    (datetime(2019, 1, 7), datetime(2019, 1, 13)),
+    (datetime(2000, 1, 1), datetime(2030, 1, 1)),
+])
+@pytest.mark.parametrize("grouping", ["weekly", "bi-weekly", "monthly"])
+def test_count_buckets(monkeypatch, start, end, grouping):
+    calls = []
+
+    def count_data_between_timestamp(*args):
+        calls.append(args)
+        return 0
+
+    monkeypatch.setattr(utils, "count_data_between_timestamp", count_data_between_timestamp)
+    utils.get_data(start, end, grouping, "usual", {})
+    assert count_buckets(start, end, grouping) == len(calls)
+
+
+def test_plan_fits():
+    controller = make_controller(budget=10 ** 6, max_request_cost=10 ** 6)
+    estimate = controller.plan(make_query())
+    assert estimate == CostEstimate("weekly", count_buckets(START, END, "weekly"),
+                                    count_buckets(START, END, "weekly") * ROWS)
+    assert controller.metrics()["downsampled"] == 0
+
+
+def test_plan_downsample():
+    max_request_cost = count_buckets(START, END, "monthly") * ROWS
+    controller = make_controller(budget=max_request_cost * 4, max_request_cost=max_request_cost)
+    estimate = controller.plan(make_query())
+    assert estimate.grouping == "monthly"
+    assert estimate.rows_scanned <= max_request_cost
+
+    metrics = controller.metrics()
+    assert metrics["downsampled"] == 1
+    assert metrics["requested_buckets_total"] == count_buckets(START, END, "weekly")
+    assert metrics["executed_buckets_total"] == 0
+
+
+def test_plan_too_expensive():
+    controller = make_controller(budget=100, max_request_cost=ROWS)
+    with pytest.raises(AdmissionRejected) as e:
+        controller.plan(make_query())
+    assert e.value.status == 429
+    assert e.value.retry_after is None
+    assert controller.metrics()["rejected_too_expensive"] == 1
+
+
+def test_admit_cheap_next_to_expensive():
+    controller = make_controller(budget=100, max_request_cost=50)
+    with controller.admit(CostEstimate("monthly", 5, 50)):
+        with controller.admit(CostEstimate("weekly", 1, ROWS)):
+            assert controller.in_flight == 50 + ROWS
+    assert controller.metrics()["queued"] == 0
+
+
+def test_admit_overloaded():
+    controller = make_controller(budget=100, max_request_cost=100)
+    estimate = CostEstimate("weekly", 10, 100)
+
+    with controller.admit(estimate):
+        with pytest.raises(AdmissionRejected) as e:
+            with controller.admit(estimate):
+                pass
+    assert e.value.status == 503
+    assert e.value.retry_after == 10
+
+    # Budget is released after both requests
+    assert controller.in_flight == 0
+    with controller.admit(estimate):
+        pass
+
+    metrics = controller.metrics()
+    assert metrics["admitted"] == 2
+    assert metrics["queued"] == 1
+    assert metrics["rejected_overloaded"] == 1
+    assert metrics["executed_rows_total"] == 200
@@ -1,17 +1,22 @@
 import pytest
 import requests
 
-from app.tests.configs.config import URL, OK, BAD_REQUEST, NOT_FOUND
-from tests.schemas.schemas import IndexResponseSchema, InfoResponseSchema, TimelineResponseSchema
+from app.tests.configs.config import URL, OK, BAD_REQUEST, NOT_FOUND, TOO_MANY_REQUESTS
+from configs.config import INVALID_VALUE_ERROR_TEXT, POSSIBLE_GROUPINGS
+from tests.schemas.schemas import (
+    IndexResponseSchema, InfoResponseSchema, TimelineResponseSchema, MetricsResponseSchema
+)
 
 
 @pytest.mark.parametrize("rout, expected_status", [
     ('', OK),
 
     ("api/info", OK),
+    ("api/metrics", OK),
 
     ("api/timeline?startDate=2019-01-01&endDate=2019-01-02", OK),
     ("api/timeline?startDate=2010-01-01&endDate=2011-01-01", OK),
+    ("api/timeline?startDate=2019-1-1&endDate=2019-1-2", OK),
 
     ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&Type=cumulative", OK),
     ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&Type=usual", OK),
@@ -28,6 +33,7 @@ from tests.schemas.schemas import IndexResponseSchema, InfoResponseSchema, Timel
 
     ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&stars=1", OK),
     ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&stars=1,2,3,4", OK),
+    ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&stars=1,1", OK),
 
     ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&asin=B0014D3N0Q", OK),
     ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&asin=B07SXC6VDM,B00463EPKI", OK),
@@ -47,6 +53,10 @@ def test_positive_status(rout, expected_status):
     ("api/timeline?endDate=2019-01-02", BAD_REQUEST),
     # startDate > endDate
     ("api/timeline?startDate=2020-01-01&endDate=2010-01-02", BAD_REQUEST),
+    # Invalid dates
+    ("api/timeline?startDate=2019-13-01&endDate=2020-01-02", BAD_REQUEST),
+    ("api/timeline?startDate=2019-02-30&endDate=2020-01-02", BAD_REQUEST),
+    ("api/timeline?startDate=20190101&endDate=2020-01-02", BAD_REQUEST),
     # Invalid Type
     ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&Type=comulative", BAD_REQUEST),
     ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&Type=USUAL", BAD_REQUEST),
@@ -73,9 +83,28 @@ def test_negative_status(rout, expected_status):
     assert r.status_code == expected_status
 
 
+@pytest.mark.parametrize("rout, field, msg", [
+    # Date parsed on fast path
+    ("api/timeline?startDate=2019-02-30&endDate=2020-01-02", "startDate",
+     "day is out of range for month"),
+    # Date parsed by strptime fallback
+    ("api/timeline?startDate=2019-13-01&endDate=2020-01-02", "startDate",
+     "time data '2019-13-01' does not match format '%Y-%m-%d'"),
+    # Filters
+    ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&brand=D", "brand", INVALID_VALUE_ERROR_TEXT),
+    ("api/timeline?startDate=2019-01-01&endDate=2019-01-02&stars=1.2,3,4", "stars",
+     "invalid literal for int() with base 10: '1.2'"),
+])
+def test_validation_error_message(rout, field, msg):
+    r = requests.get(URL + rout)
+    errors = r.json()["validation_error"]["query_params"]
+    assert {"loc": [field], "msg": msg, "type": "value_error"} in errors
+
+
 @pytest.mark.parametrize("rout, schema", [
     ("", IndexResponseSchema),
     ("/api/info", InfoResponseSchema),
+    ("/api/metrics", MetricsResponseSchema),
 
     ("api/timeline?startDate=2019-01-01&endDate=2019-03-01", TimelineResponseSchema),
     ("api/timeline?startDate=2010-01-01&endDate=2011-01-01", TimelineResponseSchema),
@@ -102,3 +131,27 @@ def test_negative_status(rout, expected_status):
 def test_response_content(rout, schema):
     r_json = requests.get(URL + rout).json()
     schema.parse_obj(r_json)
+
+
+def test_timeline_grouping_header():
+    r = requests.get(URL + "api/timeline?startDate=2019-01-01&endDate=2019-03-01&Grouping=weekly")
+    assert r.status_code == OK
+    assert r.headers["X-Timeline-Grouping"] == "weekly"
+    assert "Retry-After" not in r.headers
+
+
+def test_expensive_timeline():
+    before = requests.get(URL + "api/metrics").json()
+    r = requests.get(URL + "api/timeline?startDate=2000-01-01&endDate=2030-01-01&Grouping=weekly")
+    after = requests.get(URL + "api/metrics").json()
+
+    # Depending on DB size request is admitted as is, down-sampled or rejected
+    assert r.status_code in (OK, TOO_MANY_REQUESTS)
+    assert "Retry-After" not in r.headers
+    if r.status_code == OK:
+        grouping = r.headers["X-Timeline-Grouping"]
+        assert grouping in POSSIBLE_GROUPINGS
+        assert after["downsampled"] - before["downsampled"] == int(grouping != "weekly")
+    else:
+        assert r.json()["success"] is False
+        assert after["rejected_too_expensive"] - before["rejected_too_expensive"] == 1
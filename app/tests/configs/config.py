@@ -2,3 +2,4 @@ URL = 'http://127.0.0.1:5000/'
 OK = 200
 BAD_REQUEST = 400
 NOT_FOUND = 404
+TOO_MANY_REQUESTS = 429
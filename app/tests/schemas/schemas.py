@@ -50,6 +50,21 @@ class InfoResponseSchema(BaseModel):
                                  f"Stars: {stars}")
 
 
+class MetricsResponseSchema(BaseModel):
+    admitted: int
+    queued: int
+    downsampled: int
+    rejected_too_expensive: int
+    rejected_overloaded: int
+    requested_buckets_total: int
+    requested_rows_total: int
+    executed_buckets_total: int
+    executed_rows_total: int
+    in_flight_cost: int
+    budget: int
+    max_request_cost: int
+
+
 class TimelineResponseSchema(BaseModel):
     success: bool
     quantity: int
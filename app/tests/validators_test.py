@@ -0,0 +1,37 @@
+import pytest
+
+import validators
+from validators import EventModel
+
+POSSIBLE_VALUES = {
+    "asin": frozenset(["B0014D3N0Q", "B07SXC6VDM"]),
+    "brand": frozenset(["Downy", "Snuggle"]),
+    "source": frozenset(["amazon"]),
+    "stars": frozenset([1, 2, 3, 4, 5]),
+}
+
+
+@pytest.fixture(autouse=True)
+def possible_values(monkeypatch):
+    monkeypatch.setattr(validators, "get_values_set", POSSIBLE_VALUES.get)
+
+
+@pytest.mark.parametrize("first, second", [
+    ({"source": "amazon"}, {"source": "amazon,amazon"}),
+    ({"stars": "1"}, {"stars": "1,1"}),
+    ({"brand": "Downy,Snuggle"}, {"brand": "Snuggle,Downy,Downy"}),
+    ({"startDate": "2019-1-1"}, {"startDate": "2019-01-01"}),
+])
+def test_canonical_equal(first, second):
+    params = {"startDate": "2019-01-01", "endDate": "2019-01-02"}
+    first = EventModel(**{**params, **first}).canonical()
+    second = EventModel(**{**params, **second}).canonical()
+    assert first == second
+    assert hash(first) == hash(second)
+
+
+def test_canonical_differs():
+    params = {"startDate": "2019-01-01", "endDate": "2019-01-02"}
+    first = EventModel(**params, stars="1").canonical()
+    second = EventModel(**params, stars="1,2").canonical()
+    assert first != second
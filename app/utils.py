@@ -70,8 +70,8 @@ def count_data_between_timestamp(
         queryset = db.session.query(Event)
 
         for attr, value in filters.items():
-            if isinstance(value, list):
-                queryset = queryset.filter(getattr(Event, attr).in_(value))
+            if isinstance(value, frozenset):
+                queryset = queryset.filter(getattr(Event, attr).in_(sorted(value)))
             else:
                 queryset = queryset.filter(getattr(Event, attr) == value)
 
@@ -1,10 +1,35 @@
-from typing import Optional, Union
+from typing import NamedTuple, Optional, Union
 from pydantic import BaseModel, validator
 from datetime import datetime
 
-from configs.config import POSSIBLE_TYPES, POSSIBLE_GROUPINGS, INVALID_VALUE_ERROR_TEXT
+from cache import ttl_cache
+from configs.config import (
+    POSSIBLE_TYPES,
+    POSSIBLE_GROUPINGS,
+    INVALID_VALUE_ERROR_TEXT,
+    STATS_CACHE_TTL,
+)
 from models import db, Event
 
+DATE_FORMAT = "%Y-%m-%d"
+TYPES_SET = frozenset(POSSIBLE_TYPES)
+GROUPINGS_SET = frozenset(POSSIBLE_GROUPINGS)
+
+
+class CanonicalQuery(NamedTuple):
+    """
+    Hashable, normalized representation of validated timeline params.
+    Every filter is stored as frozenset (or None), so equal queries give equal keys.
+    """
+    startDate: datetime
+    endDate: datetime
+    Type: str
+    Grouping: str
+    asin: Optional[frozenset]
+    brand: Optional[frozenset]
+    source: Optional[frozenset]
+    stars: Optional[frozenset]
+
 
 def get_values(attr: str) -> list:
     """
@@ -16,6 +41,79 @@ def get_values(attr: str) -> list:
     return [value[0] for value in db.session.query(getattr(Event, attr)).distinct()]
 
 
+@ttl_cache(STATS_CACHE_TTL)
+def get_values_set(attr: str) -> frozenset:
+    """
+    Same as get_values, but result is cached in-process as frozenset for O(1) lookups.
+    Cache expires after STATS_CACHE_TTL seconds, so changes in DB are picked up.
+
+    :param attr: Name of column as str.
+    :return: Frozenset of unique values.
+    """
+    return frozenset(get_values(attr))
+
+
+def parse_date(val: str) -> datetime:
+    """
+    Parses date in format YYYY-MM-DD.
+    Canonical zero-padded strings are parsed by slicing, anything else falls back to
+    strptime, so accepted values and error messages stay exactly the same.
+
+    :param val: Date as str.
+    :return: Datetime object.
+    """
+    if (
+        len(val) == 10
+        and val[4] == "-"
+        and val[7] == "-"
+        and val[:4].isdigit()
+        and val[5:7].isdigit()
+        and val[8:].isdigit()
+        and val.isascii()
+    ):
+        year, month, day = int(val[:4]), int(val[5:7]), int(val[8:])
+        if 1 <= month <= 12 and 1 <= day <= 31:
+            return datetime(year, month, day)
+    return datetime.strptime(val, DATE_FORMAT)
+
+
+def parse_values(val: str, attr: str, cast: type = str) -> Union[str, int, frozenset]:
+    """
+    Validates filter value against all unique column values.
+    Comma separated values are deduplicated into frozenset.
+
+    :param val: Raw value from URL params.
+    :param attr: Name of column as str.
+    :param cast: Type each comma separated item will be converted to.
+    :return: Single value or frozenset of values.
+    """
+    possible_values = get_values_set(attr)
+
+    # Multiple values case with comma separator
+    if "," in val:
+        val = frozenset([cast(item) for item in val.split(",")])
+        if not val <= possible_values:
+            raise ValueError(INVALID_VALUE_ERROR_TEXT)
+
+    # Single value case
+    elif val not in possible_values:
+        raise ValueError(INVALID_VALUE_ERROR_TEXT)
+
+    return val
+
+
+def to_frozenset(val: Union[None, str, int, frozenset]) -> Optional[frozenset]:
+    """
+    Converts validated filter value to frozenset.
+
+    :param val: Validated filter value.
+    :return: Frozenset of values or None, if filter wasn't passed.
+    """
+    if val is None or isinstance(val, frozenset):
+        return val
+    return frozenset((val,))
+
+
 class EventModel(BaseModel):
     startDate: str
     endDate: str
@@ -26,9 +124,26 @@ class EventModel(BaseModel):
     source: Optional[str] = None
     stars: Optional[Union[int, str]] = None
 
+    def canonical(self) -> CanonicalQuery:
+        """
+        Builds hashable representation of query, which can be used as cache key.
+
+        :return: CanonicalQuery object.
+        """
+        return CanonicalQuery(
+            startDate=self.startDate,
+            endDate=self.endDate,
+            Type=self.Type,
+            Grouping=self.Grouping,
+            asin=to_frozenset(self.asin),
+            brand=to_frozenset(self.brand),
+            source=to_frozenset(self.source),
+            stars=to_frozenset(self.stars),
+        )
+
     @validator("startDate")
     def start_date_validator(cls, val):
-        return datetime.strptime(val, "%Y-%m-%d")
+        return parse_date(val)
 
     @validator("endDate")
     def end_date_validator(cls, val, values):
@@ -37,7 +152,7 @@ class EventModel(BaseModel):
             raise ValueError(
                 "startDate not provided"
             )
-        endDate = datetime.strptime(val, "%Y-%m-%d")
+        endDate = parse_date(val)
         if startDate > endDate:
             raise ValueError(
                 "endDate cannot be less then startDate"
@@ -46,7 +161,7 @@ class EventModel(BaseModel):
 
     @validator("Type")
     def type_validator(cls, val):
-        if val not in POSSIBLE_TYPES:
+        if val not in TYPES_SET:
             raise ValueError(
                 "Invalid value of Type, visit /api/info for more information"
             )
@@ -54,7 +169,7 @@ class EventModel(BaseModel):
 
     @validator("Grouping")
     def grouping_validator(cls, val):
-        if val not in POSSIBLE_GROUPINGS:
+        if val not in GROUPINGS_SET:
             raise ValueError(
                 "Invalid value of Grouping, visit /api/info for more information"
             )
@@ -64,65 +179,24 @@ class EventModel(BaseModel):
 
     @validator("asin")
     def asin_validator(cls, val):
-        asins = get_values("asin")
-
-        # Multiple values case with comma separator
-        if "," in val:
-            val = val.split(",")
-            for item in val:
-                if item not in asins:
-                    raise ValueError(INVALID_VALUE_ERROR_TEXT)
-
-        # Single value case
-        else:
-            if val not in asins:
-                raise ValueError(INVALID_VALUE_ERROR_TEXT)
-
-        return val
+        return parse_values(val, "asin")
 
     @validator("brand")
     def brand_validator(cls, val):
-        brands = get_values("brand")
-
-        if "," in val:
-            val = val.split(",")
-            for item in val:
-                if item not in brands:
-                    raise ValueError(INVALID_VALUE_ERROR_TEXT)
-        else:
-            if val not in brands:
-                raise ValueError(INVALID_VALUE_ERROR_TEXT)
-
-        return val
+        return parse_values(val, "brand")
 
     @validator("source")
     def source_validator(cls, val):
-        sources = get_values("source")
-
-        if "," in val:
-            val = val.split(",")
-            for item in val:
-                if item not in sources:
-                    raise ValueError(INVALID_VALUE_ERROR_TEXT)
-        else:
-            if val not in sources:
-                raise ValueError(INVALID_VALUE_ERROR_TEXT)
-
-        return val
+        return parse_values(val, "source")
 
     @validator("stars")
     def stars_validator(cls, val):
-        stars = get_values("stars")
-
         if isinstance(val, str):
-            if "," in val:
-                val = [int(v) for v in val.split(",")]
-                for item in val:
-                    if item not in stars:
-                        raise ValueError(INVALID_VALUE_ERROR_TEXT)
-            else:
-                raise ValueError(INVALID_VALUE_ERROR_TEXT)
-        else:
-            if val not in stars:
+            # Non-numeric single value, ex. stars=one
+            if "," not in val:
                 raise ValueError(INVALID_VALUE_ERROR_TEXT)
+            return parse_values(val, "stars", cast=int)
+
+        if val not in get_values_set("stars"):
+            raise ValueError(INVALID_VALUE_ERROR_TEXT)
         return val